@@ -6,7 +6,9 @@ The API provides two endpoints:
 * **GET /summary** — given a `patient_id` or a free‑text `query`,
   return the most relevant patient summary.  If an exact patient id is
   provided and found, that summary is returned.  Otherwise the query
-  string is used in a retrieval over all summaries.
+  string is used in a retrieval over all summaries.  Retrieval
+  queries from concurrent requests are micro-batched and scored
+  together by a background task.
 
 Start the server locally with:
 
@@ -20,44 +22,178 @@ independently of the rest of the project.
 
 from __future__ import annotations
 
-import csv
+import asyncio
+from contextlib import asynccontextmanager
 from functools import lru_cache
-from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import pandas as pd
 from fastapi import FastAPI, HTTPException, Query
 
+from src.data_utils_fhir import summaries_path
 from src.summarizer import RetrievalSummariser
 
-app = FastAPI(title="MIMIC‑IV Demo Summarisation API")
+# Retrieval queries arriving within BATCH_WINDOW_S of each other (up to
+# BATCH_MAX_SIZE of them) are vectorised and scored together.  A queued
+# query that is not answered within QUERY_TIMEOUT_S fails with 503.
+BATCH_WINDOW_S = 0.005
+BATCH_MAX_SIZE = 64
+QUERY_TIMEOUT_S = 10.0
+
+# Only set while the app's lifespan is running; otherwise /summary
+# scores each query directly.
+_query_queue: Optional[asyncio.Queue] = None
+_batcher_task: Optional[asyncio.Task] = None
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Warm the retriever, then run the query batcher for the app's lifetime."""
+    global _query_queue, _batcher_task
+    # Load the summaries and fit the index up front, off the event loop,
+    # so the first requests neither block the loop nor time out waiting
+    # for the index to be built.
+    await asyncio.to_thread(_init_retriever)
+    _query_queue = asyncio.Queue()
+    _batcher_task = asyncio.create_task(_batcher(_query_queue))
+    try:
+        yield
+    finally:
+        queue, task = _query_queue, _batcher_task
+        _query_queue = None
+        _batcher_task = None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # Fail anything still queued rather than leaving requests waiting.
+        while not queue.empty():
+            _fail_items([queue.get_nowait()])
+
+
+app = FastAPI(title="MIMIC‑IV Demo Summarisation API", lifespan=_lifespan)
 
 
 @lru_cache(maxsize=1)
 def _load_summaries() -> Dict[str, str]:
-    """Load patient summaries from the CSV file.
+    """Load patient summaries from the file written by `demo.py`.
+
+    The file is chosen by `summaries_path()` (the SUMMARIES_PATH
+    environment variable, defaulting to `data/patient_summaries.csv`);
+    a `.parquet` suffix reads Parquet (requires `pyarrow`), anything
+    else is read as CSV.
 
     Returns:
         Mapping of patient id to summary text.
     """
-    csv_path = Path(__file__).resolve().parent.parent / "data" / "patient_summaries.csv"
-    summaries: Dict[str, str] = {}
-    if not csv_path.exists():
+    path = summaries_path()
+    if not path.exists():
         raise FileNotFoundError(
-            f"Expected summary CSV at {csv_path}, please run demo.py to generate it."
+            f"Expected summary file at {path}, please run demo.py to generate it "
+            f"(or set SUMMARIES_PATH)."
         )
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            summaries[row["patient_id"]] = row["summary"]
-    return summaries
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=["patient_id", "summary"])
+        columns = table.to_pydict()
+        return dict(zip(columns["patient_id"], columns["summary"]))
+    # keep_default_na=False keeps cells such as "NA" as text, like csv.DictReader
+    df = pd.read_csv(
+        path,
+        dtype=str,
+        usecols=["patient_id", "summary"],
+        keep_default_na=False,
+        encoding="utf-8",
+    )
+    return dict(zip(df["patient_id"].tolist(), df["summary"].tolist()))
 
 
 @lru_cache(maxsize=1)
-def _init_retriever() -> RetrievalSummariser:
-    """Instantiate the retrieval summariser from loaded summaries."""
+def _load_ids_and_docs() -> Tuple[List[str], List[str]]:
+    """Split the loaded summaries into parallel lists of ids and texts.
+
+    Returns:
+        Tuple `(ids, docs)` where `docs[i]` is the summary of `ids[i]`.
+    """
     summaries = _load_summaries()
+    ids: List[str] = list(summaries.keys())
     docs: List[str] = list(summaries.values())
-    return RetrievalSummariser(docs)
+    return ids, docs
+
+
+@lru_cache(maxsize=1)
+def _init_retriever() -> RetrievalSummariser:
+    """Instantiate the retrieval summariser from loaded summaries."""
+    ids, docs = _load_ids_and_docs()
+    return RetrievalSummariser(docs, ids=ids)
+
+
+def _fail_items(items: List[Tuple[str, int, asyncio.Future]]) -> None:
+    """Fail queued queries whose batch will never be scored."""
+    for _, _, fut in items:
+        if not fut.done():
+            fut.set_exception(
+                HTTPException(status_code=503, detail="Summary service is shutting down")
+            )
+
+
+async def _run_batch(items: List[Tuple[str, int, asyncio.Future]]) -> None:
+    """Score a batch of queued queries and resolve their futures."""
+    by_top_k: Dict[int, List[Tuple[str, asyncio.Future]]] = {}
+    for q, top_k, fut in items:
+        by_top_k.setdefault(top_k, []).append((q, fut))
+    for top_k, group in by_top_k.items():
+        queries = [q for q, _ in group]
+        try:
+            retriever = await asyncio.to_thread(_init_retriever)
+            results = await asyncio.to_thread(
+                retriever.query_batch_with_indices, queries, top_k
+            )
+        except Exception as exc:
+            for _, fut in group:
+                if not fut.done():
+                    fut.set_exception(exc)
+            continue
+        for (_, fut), ranked in zip(group, results):
+            if not fut.done():
+                fut.set_result(ranked)
+
+
+async def _batcher(queue: asyncio.Queue) -> None:
+    """Drain the query queue in small time-boxed batches."""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        try:
+            deadline = loop.time() + BATCH_WINDOW_S
+            while len(items) < BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await _run_batch(items)
+        except asyncio.CancelledError:
+            _fail_items(items)
+            raise
+
+
+async def _retrieve(q: str, top_k: int) -> List[Tuple[int, float]]:
+    """Score a query through the batcher, or directly if none is running."""
+    queue, task = _query_queue, _batcher_task
+    if queue is None or task is None or task.done():
+        retriever = await asyncio.to_thread(_init_retriever)
+        results = await asyncio.to_thread(retriever.query_batch_with_indices, [q], top_k)
+        return results[0]
+    fut = asyncio.get_running_loop().create_future()
+    await queue.put((q, top_k, fut))
+    try:
+        return await asyncio.wait_for(fut, QUERY_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Timed out waiting for retrieval") from None
 
 
 @app.get("/health")
@@ -66,7 +202,7 @@ def health_check():
 
 
 @app.get("/summary")
-def get_summary(
+async def get_summary(
     patient_id: Optional[str] = Query(None, description="Exact patient UUID"),
     query: Optional[str] = Query(None, description="Free text query")
 ):
@@ -77,21 +213,22 @@ def get_summary(
     retrieval engine is used with the provided `query` (or the
     patient_id string) to find the most similar summary.
     """
-    summaries = _load_summaries()
-    retriever = _init_retriever()
+    # The loaders are cached, but the first call reads the summaries file;
+    # keep that off the event loop.
+    summaries = await asyncio.to_thread(_load_summaries)
     if patient_id and patient_id in summaries:
         return {"patient_id": patient_id, "summary": summaries[patient_id]}
     # Determine which query string to use
     q = query or patient_id
     if not q:
         raise HTTPException(status_code=400, detail="Either patient_id or query must be provided")
-    results = retriever.query(q, top_k=3)
+    results = await _retrieve(q, top_k=3)
     if not results:
         raise HTTPException(status_code=404, detail="No summaries found for the given query")
-    response = []
-    # Map back to patient ids by matching summary text; this is O(n)
-    inv_map = {v: k for k, v in summaries.items()}
-    for summary_text, score in results:
-        pid = inv_map.get(summary_text, "unknown")
-        response.append({"patient_id": pid, "summary": summary_text, "score": score})
+    # Retriever indices line up with the cached id/summary lists
+    ids, docs = await asyncio.to_thread(_load_ids_and_docs)
+    response = [
+        {"patient_id": ids[idx], "summary": docs[idx], "score": score}
+        for idx, score in results
+    ]
     return {"results": response}
@@ -13,15 +13,21 @@ Make sure that the `mimic_iv_project` package is on the Python path
 (for example by running the script from the repository root) and that
 the FHIR demo dataset has been extracted into the directory
 `../mimic_iv_demo/mimic-iv-clinical-database-demo-on-fhir-2.1.0/fhir` relative to this file.  You can set a custom
-environment variable `FHIR_DIR` to override the default path.
+environment variable `FHIR_DIR` to override the default path, and
+`SUMMARIES_PATH` to write the summaries elsewhere (a `.parquet` suffix
+writes Parquet instead of CSV).
 """
 
 from __future__ import annotations
 
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from src.data_utils_fhir import load_patients, load_conditions, build_patient_summaries, save_summaries_to_csv
+from src.data_utils_fhir import (
+    load_patients, load_conditions, build_patient_summaries, save_summaries_to_csv,
+    save_summaries_to_parquet, summaries_path
+)
 from src.evaluation import evaluate_retrieval_accuracy, length_statistics
 from src.summarizer import RetrievalSummariser
 
@@ -37,33 +43,45 @@ def main() -> None:
         )
 
     print(f"Loading FHIR resources from: {fhir_dir}")
-    patients = load_patients(fhir_dir)
-    print(f"Loaded {len(patients)} patients")
-    conditions = load_conditions(fhir_dir)
+    # The two files are independent and decoding them is CPU-bound, so
+    # parse them in separate processes.
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        patients_future = executor.submit(load_patients, fhir_dir)
+        conditions_future = executor.submit(load_conditions, fhir_dir)
+        patients = patients_future.result()
+        conditions = conditions_future.result()
+    genders, _ = patients
+    print(f"Loaded {len(genders)} patients")
     print(f"Loaded condition lists for {len(conditions)} patients")
 
     # Build summaries
     summaries = build_patient_summaries(patients, conditions)
     print(f"Generated summaries for {len(summaries)} patients")
 
-    # Save to CSV
-    out_csv = Path(__file__).resolve().parent / "data" / "patient_summaries.csv"
-    save_summaries_to_csv(summaries, out_csv)
-    print(f"Summaries saved to {out_csv}")
+    # Save to CSV (or Parquet, depending on SUMMARIES_PATH)
+    out_path = summaries_path()
+    if out_path.suffix == ".parquet":
+        save_summaries_to_parquet(summaries, out_path)
+    else:
+        save_summaries_to_csv(summaries, out_path)
+    print(f"Summaries saved to {out_path}")
 
-    # Evaluate retrieval accuracy (smoke test)
+    # Evaluate retrieval accuracy (smoke test of the TF-IDF path, then
+    # of the exact-prefix id index)
     acc = evaluate_retrieval_accuracy(summaries)
-    print(f"Retrieval accuracy (using patient ID prefix) = {acc:.2%}")
+    print(f"TF-IDF retrieval accuracy (using patient ID prefix) = {acc:.2%}")
+    acc_index = evaluate_retrieval_accuracy(summaries, use_id_index=True)
+    print(f"ID-index retrieval accuracy (using patient ID prefix) = {acc_index:.2%}")
     stats = length_statistics(summaries)
     print(
         f"Summary length statistics: min={stats['min']:.0f}, max={stats['max']:.0f}, mean={stats['mean']:.1f} characters"
     )
 
     # Demo queries
-    retriever = RetrievalSummariser(list(summaries.values()))
+    retriever = RetrievalSummariser(list(summaries.values()), ids=list(summaries.keys()))
     queries = [
         "heart failure",  # common condition query
-        next(iter(patients.keys()))[:8],  # sample patient ID prefix
+        next(iter(genders))[:8],  # sample patient ID prefix
         "pneumonia diabetes"  # multi‑condition query
     ]
     print("\nExample queries:")
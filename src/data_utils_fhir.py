@@ -17,10 +17,32 @@ procedures, observations) by adding new functions.
 
 from __future__ import annotations
 
-import gzip
 import json
+import os
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+try:  # isal is optional; its SIMD-accelerated inflate replaces gzip
+    from isal import igzip as _gzip
+except ImportError:
+    import gzip as _gzip
+
+try:  # orjson is optional; it parses NDJSON several times faster
+    import orjson as _json
+except ImportError:
+    _json = json
+
+
+# Where `demo.py` writes the summaries and the API reads them from.  The
+# file suffix selects the format (`.csv` or `.parquet`); override with
+# the SUMMARIES_PATH environment variable.
+DEFAULT_SUMMARIES_PATH = Path(__file__).resolve().parent.parent / "data" / "patient_summaries.csv"
+
+
+def summaries_path() -> Path:
+    """Return the summaries file shared by `demo.py` and the API."""
+    return Path(os.environ.get("SUMMARIES_PATH", DEFAULT_SUMMARIES_PATH))
 
 
 def _open_ndjson_gz(path: Path):
@@ -32,42 +54,48 @@ def _open_ndjson_gz(path: Path):
     Yields:
         Dict representing each resource on each line.
     """
-    with gzip.open(path, mode="rt", encoding="utf-8") as fh:
+    # Read raw bytes so lines go straight to the decoder without a
+    # text-decoding layer; gzip already buffers the underlying reads.
+    with _gzip.open(path, mode="rb") as fh:
         for line in fh:
             if not line.strip():
                 continue
             try:
-                yield json.loads(line)
+                yield _json.loads(line)
             except json.JSONDecodeError:
-                # Skip malformed lines gracefully.
+                # Skip malformed lines gracefully (orjson's
+                # JSONDecodeError subclasses json.JSONDecodeError).
                 continue
 
 
-def load_patients(fhir_dir: Path) -> Dict[str, Dict[str, str]]:
+def load_patients(fhir_dir: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
     """Load patients and basic demographics from MimicPatient.ndjson.gz.
 
+    Demographics are stored column-wise, one dict per field, rather than
+    as one small dict per patient.
+
     Args:
         fhir_dir: directory containing FHIR NDJSON files (expects
                   MimicPatient.ndjson.gz inside).
 
     Returns:
-        Mapping from patient UUID to a dict with keys `gender` and
-        `birthDate` (may be missing if not provided).
+        Tuple `(genders, birth_dates)` of mappings from patient UUID to
+        gender and to birth date.  Both contain every patient, with
+        `"unknown"` for missing or empty values.
     """
     patient_file = fhir_dir / "MimicPatient.ndjson.gz"
-    patients: Dict[str, Dict[str, str]] = {}
+    genders: Dict[str, str] = {}
+    birth_dates: Dict[str, str] = {}
     for resource in _open_ndjson_gz(patient_file):
         pid = resource.get("id")
         if not pid:
             continue
-        patients[pid] = {
-            "gender": resource.get("gender", "unknown"),
-            "birthDate": resource.get("birthDate", "unknown"),
-        }
-    return patients
+        genders[pid] = resource.get("gender") or "unknown"
+        birth_dates[pid] = resource.get("birthDate") or "unknown"
+    return genders, birth_dates
 
 
-def load_conditions(fhir_dir: Path) -> Dict[str, List[str]]:
+def load_conditions(fhir_dir: Path) -> Dict[str, Tuple[str, ...]]:
     """Load conditions grouped by patient from MimicCondition.ndjson.gz.
 
     Args:
@@ -75,10 +103,14 @@ def load_conditions(fhir_dir: Path) -> Dict[str, List[str]]:
                   MimicCondition.ndjson.gz inside).
 
     Returns:
-        Mapping from patient UUID to a list of condition descriptions.
+        Mapping from patient UUID to a sorted tuple of unique condition
+        descriptions.
     """
     condition_file = fhir_dir / "MimicCondition.ndjson.gz"
-    conditions_by_patient: Dict[str, List[str]] = {}
+    conditions_by_patient: Dict[str, List[str]] = defaultdict(list)
+    # Condition labels repeat across thousands of resources; share one
+    # string object per distinct label.
+    intern_cache: Dict[str, str] = {}
     for resource in _open_ndjson_gz(condition_file):
         # Find the patient this condition applies to
         subject_ref = resource.get("subject", {}).get("reference")
@@ -89,8 +121,9 @@ def load_conditions(fhir_dir: Path) -> Dict[str, List[str]]:
         # Extract descriptive label for the condition
         cond_desc = None
         code = resource.get("code", {})
+        coding_list = code.get("coding", ())
         # Try `code.coding.display`
-        for coding in code.get("coding", []):
+        for coding in coding_list:
             display = coding.get("display")
             if display:
                 cond_desc = display
@@ -98,36 +131,41 @@ def load_conditions(fhir_dir: Path) -> Dict[str, List[str]]:
         # Fallback to `code.text` or `coding.code`
         if not cond_desc:
             cond_desc = code.get("text") or None
-        if not cond_desc:
-            coding_list = code.get("coding", [])
-            if coding_list:
-                cond_desc = coding_list[0].get("code")
+        if not cond_desc and coding_list:
+            cond_desc = coding_list[0].get("code")
         if not cond_desc:
             cond_desc = "Unknown condition"
 
-        conditions_by_patient.setdefault(patient_id, []).append(cond_desc)
-    return conditions_by_patient
+        cond_desc = intern_cache.setdefault(cond_desc, cond_desc)
+        conditions_by_patient[patient_id].append(cond_desc)
+    # Dedup and sort once here so summary building is plain string work
+    return {
+        pid: tuple(sorted(set(conds)))
+        for pid, conds in conditions_by_patient.items()
+    }
 
 
-def build_patient_summaries(patients: Dict[str, Dict[str, str]],
-                            conditions: Dict[str, List[str]]) -> Dict[str, str]:
+def build_patient_summaries(patients: Tuple[Dict[str, str], Dict[str, str]],
+                            conditions: Dict[str, Tuple[str, ...]]) -> Dict[str, str]:
     """Construct a summary string for each patient.
 
     The summary includes the patient’s gender, birth date and a list of
     unique condition descriptions.
 
     Args:
-        patients: mapping of patient id to demographics
-        conditions: mapping of patient id to list of conditions
+        patients: `(genders, birth_dates)` tuple as returned by
+                  `load_patients`
+        conditions: mapping of patient id to sorted unique conditions, as
+                    returned by `load_conditions`
 
     Returns:
         Mapping from patient id to a human‑readable summary string.
     """
+    genders, birth_dates = patients
     summaries: Dict[str, str] = {}
-    for pid, demo in patients.items():
-        gender = demo.get("gender", "unknown")
-        birth = demo.get("birthDate", "unknown")
-        conds = sorted(set(conditions.get(pid, [])))
+    for pid, gender in genders.items():
+        birth = birth_dates.get(pid, "unknown")
+        conds = conditions.get(pid, ())
         cond_str = ", ".join(conds) if conds else "None recorded"
         summaries[pid] = (
             f"Patient {pid}: gender={gender}, birthDate={birth}. "
@@ -148,5 +186,23 @@ def save_summaries_to_csv(summaries: Dict[str, str], out_path: Path) -> None:
     with open(out_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["patient_id", "summary"])
-        for pid, summary in summaries.items():
-            writer.writerow([pid, summary])
+        writer.writerows(summaries.items())
+
+
+def save_summaries_to_parquet(summaries: Dict[str, str], out_path: Path) -> None:
+    """Save the patient summaries into a zstd‑compressed Parquet file.
+
+    Requires `pyarrow`.
+
+    Args:
+        summaries: mapping from patient id to summary string
+        out_path: path to the Parquet file to write
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.table({
+        "patient_id": list(summaries.keys()),
+        "summary": list(summaries.values()),
+    })
+    pq.write_table(table, out_path, compression="zstd")
@@ -18,10 +18,68 @@ result = summariser.query("0a8eebfd")  # returns best matching summary
 
 from __future__ import annotations
 
-from typing import List, Tuple
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+import numpy as np
+from scipy.sparse import spmatrix
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
+
+try:  # numba is optional; without it scoring stays on the sparse path
+    import numba as nb
+except ImportError:
+    nb = None
+
+# Queries that look like a patient UUID prefix are answered from an
+# exact-prefix index instead of TF‑IDF.
+ID_PREFIX_LEN = 8
+_ID_PREFIX_RE = re.compile(rf"[0-9a-f]{{{ID_PREFIX_LEN}}}")
+
+# Number of distinct (query, top_k) results memoised per summariser.
+QUERY_CACHE_SIZE = 1024
+
+# Number of hashed term features; large enough that collisions between
+# the terms of a summary corpus are rare.
+N_FEATURES = 1 << 18
+
+# Densify the TF‑IDF matrix for the numba kernels only while it stays
+# small (number of documents × number of terms in use).
+DENSE_MAX_CELLS = 1_000_000
+
+
+# The kernels are deliberately serial: at the sizes allowed by
+# DENSE_MAX_CELLS threads buy nothing, and numba's parallel runtime can
+# hang interpreter shutdown when first used from a non-main thread (the
+# API scores in worker threads).
+if nb is not None:
+    @nb.njit(fastmath=True, cache=True)
+    def _dense_scores(mat, q):
+        """Dot product of each row of `mat` (N × V) with the query `q` (V,)."""
+        n, v = mat.shape
+        out = np.empty(n, dtype=np.float32)
+        for i in range(n):
+            s = np.float32(0.0)
+            for j in range(v):
+                s += mat[i, j] * q[j]
+            out[i] = s
+        return out
+
+    @nb.njit(fastmath=True, cache=True)
+    def _dense_scores_batch(mat, queries):
+        """Scores (B × N) of each query row (B × V) against each row of `mat`."""
+        n, v = mat.shape
+        b = queries.shape[0]
+        out = np.empty((b, n), dtype=np.float32)
+        for r in range(b):
+            for i in range(n):
+                s = np.float32(0.0)
+                for j in range(v):
+                    s += mat[i, j] * queries[r, j]
+                out[r, i] = s
+        return out
 
 
 class RetrievalSummariser:
@@ -30,30 +88,237 @@ class RetrievalSummariser:
     Args:
         documents: list of documents (patient summaries).  Each document
             is treated as a single text to retrieve against.
+        ids: optional patient ids aligned with `documents`.  When given,
+            queries equal to the first eight characters of an id are
+            answered by exact lookup rather than TF‑IDF similarity.
     """
 
-    def __init__(self, documents: List[str]) -> None:
+    def __init__(self, documents: List[str], ids: Optional[List[str]] = None) -> None:
         self.documents = documents
-        self.vectoriser = TfidfVectorizer(stop_words="english")
-        self.matrix = self.vectoriser.fit_transform(documents)
+        self._prefix_index: Dict[str, List[int]] = {}
+        if ids is not None:
+            if len(ids) != len(documents):
+                raise ValueError("ids and documents must have the same length")
+            for idx, pid in enumerate(ids):
+                self._prefix_index.setdefault(pid[:ID_PREFIX_LEN], []).append(idx)
+        # Hashing terms avoids storing a vocabulary.  L2‑normalised rows
+        # make cosine similarity a plain dot product; float32 halves the
+        # memory traffic of the sparse values.
+        self.vectoriser = make_pipeline(
+            HashingVectorizer(stop_words="english", n_features=N_FEATURES,
+                              alternate_sign=False, norm=None, dtype=np.float32),
+            TfidfTransformer(norm="l2"),
+        )
+        self.matrix = self.vectoriser.fit_transform(documents).tocsr()
+        # The dense copy keeps only the hashed columns some document uses;
+        # query vectors are sliced to the same columns before scoring.
+        self.dense = None
+        self._dense_columns = np.unique(self.matrix.indices)
+        if nb is not None and self.matrix.shape[0] * self._dense_columns.size < DENSE_MAX_CELLS:
+            self.dense = np.ascontiguousarray(
+                self.matrix[:, self._dense_columns].toarray(), dtype=np.float32
+            )
+        # LRU memo of (query, top_k) -> ranked results, shared by the
+        # single and batched paths.  Tuples keep the cached values
+        # immutable; the lock guards concurrent callers (the API scores
+        # from worker threads).
+        self._query_cache: OrderedDict[
+            Tuple[str, int], Tuple[Tuple[int, float], ...]
+        ] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def clear_cache(self) -> None:
+        """Drop memoised query results (call after changing `documents`)."""
+        with self._cache_lock:
+            self._query_cache.clear()
+
+    def _cache_get(self, query: str, top_k: int) -> Optional[Tuple[Tuple[int, float], ...]]:
+        """Return memoised results for `(query, top_k)`, or None."""
+        key = (query, top_k)
+        with self._cache_lock:
+            ranked = self._query_cache.get(key)
+            if ranked is not None:
+                self._query_cache.move_to_end(key)
+            return ranked
+
+    def _cache_put(self, query: str, top_k: int,
+                   ranked: List[Tuple[int, float]]) -> Tuple[Tuple[int, float], ...]:
+        """Memoise results for `(query, top_k)`, evicting the oldest entry."""
+        frozen = tuple(ranked)
+        with self._cache_lock:
+            self._query_cache[(query, top_k)] = frozen
+            self._query_cache.move_to_end((query, top_k))
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return frozen
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Select the `top_k` highest scores via a partial sort.
+
+        Args:
+            scores: 1‑D array of similarity scores, one per document
+            top_k: number of documents to keep
+
+        Returns:
+            List of tuples (index, score) sorted by decreasing score.
+        """
+        k = min(top_k, scores.size)
+        if k <= 0:
+            return []
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(int(i), float(scores[i])) for i in idx]
+
+    def _prefix_lookup(self, query: str, top_k: int) -> Optional[List[Tuple[int, float]]]:
+        """Resolve an id‑prefix query from the exact-prefix index.
+
+        Args:
+            query: free‑text query or patient id prefix
+            top_k: maximum number of documents to return
+
+        Returns:
+            List of tuples (index, 1.0) for the matching documents, or
+            None if the query is not a known id prefix.
+        """
+        if not self._prefix_index or not _ID_PREFIX_RE.fullmatch(query):
+            return None
+        idxs = self._prefix_index.get(query)
+        if idxs is None:
+            return None
+        return [(idx, 1.0) for idx in idxs[:top_k]]
+
+    def _similarities(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """Compute the top‑k similarity scores between a query and the documents.
 
-    def _similarities(self, query: str) -> List[Tuple[int, float]]:
-        """Compute similarity scores between a query and all documents.
+        Only the `top_k` best documents are selected (via a partial sort)
+        and ranked, rather than sorting the scores of every document.
 
         Args:
             query: free‑text query
+            top_k: number of documents to keep
 
         Returns:
             List of tuples (index, score) sorted by decreasing score.
         """
-        if not query:
+        if not query or top_k <= 0:
             return []
-        q_vec = self.vectoriser.transform([query])
-        cosine_similarities = linear_kernel(q_vec, self.matrix).flatten()
-        indexed = list(enumerate(cosine_similarities))
-        ranked = sorted(indexed, key=lambda x: x[1], reverse=True)
+        hits = self._prefix_lookup(query, top_k)
+        if hits is not None:
+            return hits
+        return self.query_vectors(self.vectoriser.transform([query]), top_k)[0]
+
+    def _cached_similarities(self, query: str,
+                             top_k: int) -> Tuple[Tuple[int, float], ...]:
+        """Memoised form of :meth:`_similarities`."""
+        ranked = self._cache_get(query, top_k)
+        if ranked is None:
+            ranked = self._cache_put(query, top_k, self._similarities(query, top_k))
         return ranked
 
+    def _similarities_batch(self, queries: List[str],
+                            top_k: int) -> List[List[Tuple[int, float]]]:
+        """Compute top‑k similarity scores for many queries at once.
+
+        Id-prefix queries are answered from the prefix index and repeated
+        queries from the memo cache; the remaining distinct queries are
+        vectorised in a single call, scored by :meth:`query_vectors` and
+        memoised.
+
+        Args:
+            queries: free‑text queries
+            top_k: number of documents to keep per query
+
+        Returns:
+            One list of tuples (index, score) per query, each sorted by
+            decreasing score.  Empty queries yield an empty list.
+        """
+        ranked: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        if top_k <= 0:
+            return ranked
+        # Only distinct queries missing from the prefix index and the
+        # cache are vectorised and scored.
+        pending: Dict[str, List[int]] = {}
+        for i, query in enumerate(queries):
+            if not query:
+                continue
+            hits = self._prefix_lookup(query, top_k)
+            if hits is None:
+                cached = self._cache_get(query, top_k)
+                hits = list(cached) if cached is not None else None
+            if hits is not None:
+                ranked[i] = hits
+            else:
+                pending.setdefault(query, []).append(i)
+        if not pending:
+            return ranked
+        q_mat = self.vectoriser.transform(list(pending))
+        for (query, positions), hits in zip(pending.items(), self.query_vectors(q_mat, top_k)):
+            self._cache_put(query, top_k, hits)
+            for i in positions:
+                ranked[i] = list(hits)
+        return ranked
+
+    def query_vectors(self, q_mat: spmatrix, top_k: int = 1) -> List[List[Tuple[int, float]]]:
+        """Retrieve top‑k document indices for already vectorised queries.
+
+        This skips tokenisation, so callers holding query vectors from
+        `vectoriser.transform` can score them directly.  The queries are
+        scored with one matrix product; each row is then ranked on its
+        own so the full (queries × documents) matrix is never densified.
+
+        Args:
+            q_mat: sparse matrix of query vectors (queries × features)
+            top_k: number of documents to return per query
+
+        Returns:
+            One list of tuples (document index, score) per query row, in
+            descending order of score.
+        """
+        n_queries = q_mat.shape[0]
+        if top_k <= 0:
+            return [[] for _ in range(n_queries)]
+        if self.dense is not None:
+            q_dense = np.ascontiguousarray(
+                q_mat[:, self._dense_columns].toarray(), dtype=np.float32
+            )
+            if n_queries == 1:
+                return [self._top_k(_dense_scores(self.dense, q_dense[0]), top_k)]
+            dense_scores = _dense_scores_batch(self.dense, q_dense)
+            return [self._top_k(row, top_k) for row in dense_scores]
+        scores = (q_mat @ self.matrix.T).tocsr()
+        return [
+            self._top_k(scores.getrow(i).toarray().ravel(), top_k)
+            for i in range(n_queries)
+        ]
+
+    def query_with_indices(self, query: str, top_k: int = 1) -> List[Tuple[int, float]]:
+        """Retrieve the indices of the top‑k documents most relevant to the query.
+
+        Args:
+            query: free‑text query or patient id
+            top_k: number of documents to return
+
+        Returns:
+            List of tuples (document index, score) in descending order of
+            score.  Indices refer to positions in `documents`.
+        """
+        return list(self._cached_similarities(query, top_k))
+
+    def query_batch_with_indices(self, queries: List[str],
+                                 top_k: int = 1) -> List[List[Tuple[int, float]]]:
+        """Retrieve top‑k document indices for each of several queries.
+
+        Args:
+            queries: free‑text queries or patient ids
+            top_k: number of documents to return per query
+
+        Returns:
+            One list of tuples (document index, score) per query, in
+            descending order of score.
+        """
+        return self._similarities_batch(queries, top_k)
+
     def query(self, query: str, top_k: int = 1) -> List[Tuple[str, float]]:
         """Retrieve the top‑k summaries most relevant to the query.
 
@@ -64,8 +329,28 @@ class RetrievalSummariser:
         Returns:
             List of tuples (summary, score) in descending order of score.
         """
-        ranked = self._similarities(query)
+        ranked = self._cached_similarities(query, top_k)
         results: List[Tuple[str, float]] = []
-        for idx, score in ranked[:top_k]:
-            results.append((self.documents[idx], float(score)))
+        for idx, score in ranked:
+            results.append((self.documents[idx], score))
         return results
+
+    def query_batch(self, queries: List[str],
+                    top_k: int = 1) -> List[List[Tuple[str, float]]]:
+        """Retrieve the top‑k summaries for each of several queries.
+
+        Equivalent to calling :meth:`query` once per query, but the
+        queries are vectorised and scored together.
+
+        Args:
+            queries: free‑text queries or patient ids
+            top_k: number of documents to return per query
+
+        Returns:
+            One list of tuples (summary, score) per query, in descending
+            order of score.
+        """
+        return [
+            [(self.documents[idx], score) for idx, score in ranked]
+            for ranked in self._similarities_batch(queries, top_k)
+        ]